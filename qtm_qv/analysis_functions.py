@@ -13,15 +13,34 @@
 # limitations under the License.
 ''' Functions for plotting quantum volume data from Quantinuum. '''
 
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import multiprocessing
+from typing import Optional, Union
 
 import numpy as np
 from scipy.special import erf
 
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
 
-def original_bounds(success: float,
-                    trials: int):
-    ''' Returns bounds from original CI method. '''
+SeedLike = Union[None, int, np.random.SeedSequence, np.random.Generator]
+
+# Independently seeded streams used by the numba kernel, one seed each.
+# Fixed so that seeded results do not depend on the number of threads.
+_KERNEL_BLOCKS = 64
+
+
+def original_bounds(success,
+                    trials):
+    '''
+    Returns bounds from original CI method.
+
+    success and trials may be scalars or equal-length arrays, in which
+    case the bounds are computed elementwise.
+    '''
 
     sigma = np.sqrt(success*(1 - success)/trials)
     lower_ci = success - 2*sigma
@@ -30,49 +49,206 @@ def original_bounds(success: float,
     return lower_ci, upper_ci
 
 
-def bootstrap_bounds(qv_fitter,
+def bootstrap_bounds(shots: np.ndarray,
+                     heavy: np.ndarray,
                      reps: int = 1000,
-                     ntrials: Optional[int] = None):
+                     rng: SeedLike = None,
+                     approx: Union[bool, str] = 'auto'):
     ''' Returns bounds from bootstrap CI method. '''
 
-    nqubits = len(qv_fitter.qubit_lists[0])
-
     success = bootstrap(
-        qv_fitter,
+        shots,
+        heavy,
         reps,
-        ntrials
+        rng,
+        approx
     )
-    qv_mean = np.mean([
-        qv_fitter.heavy_output_counts[f'qv_depth_{nqubits}_trial_{i}']/qv_fitter._circ_shots[f'qv_depth_{nqubits}_trial_{i}']
-        for i in range(ntrials)
-    ])
+    qv_mean = (heavy/shots).mean()
     lower_ci = 2*qv_mean - np.quantile(success, 1/2 + erf(np.sqrt(2))/2)
     upper_ci = 2*qv_mean - np.quantile(success, 1/2 - erf(np.sqrt(2))/2)
 
     return lower_ci, upper_ci
     
 
-def bootstrap(qv_fitter,
+def bootstrap(shots: np.ndarray,
+              heavy: np.ndarray,
               reps: int = 1000,
-              ntrials: Optional[int] = None):
-    ''' Semi-parameteric bootstrap QV data. '''
-    nqubits = len(qv_fitter.qubit_lists[0])
-        
-    if not ntrials:
-        ntrials = len(qv_fitter.heavy_output_counts)
-        
-    shot_list = np.array([
-        qv_fitter._circ_shots[f'qv_depth_{nqubits}_trial_{i}']
-        for i in range(ntrials)
-    ])
-    success_list = np.array([
-        qv_fitter.heavy_output_counts[f'qv_depth_{nqubits}_trial_{i}']/shot_list[i]
-        for i in range(ntrials)
-    ])
+              rng: SeedLike = None,
+              approx: Union[bool, str] = 'auto'):
+    '''
+    Semi-parameteric bootstrap QV data.
+
+    With approx=True the binomial redraw of each resampled circuit is
+    replaced by a normal approximation, rounded and clipped to [0, shots].
+    With approx='auto' this is done only when n*p and n*(1 - p) are at
+    least 25 for every circuit, where the approximation is accurate.
+
+    When numba is installed the resampling runs in a jitted kernel that
+    draws from numba's per-thread np.random streams, seeded from rng.
+    A given rng therefore reproduces the same samples only within one
+    environment: results differ with and without numba. The kernel also
+    reseeds numba's global per-thread generators, which other jitted code
+    in the process shares.
+    '''
+    rng = np.random.default_rng(rng)
+    normal = _use_normal(shots, heavy, approx)
+
+    if _bootstrap_kernel is not None:
+        return _bootstrap_kernel(
+            np.ascontiguousarray(shots, dtype=np.int64),
+            np.ascontiguousarray(heavy, dtype=np.float64),
+            reps,
+            rng.integers(2**31, size=_KERNEL_BLOCKS),
+            normal
+        )
+
+    ntrials = len(shots)
+    success_list = heavy/shots
     probs = success_list[
-        np.random.randint(0, ntrials, size=(reps, ntrials))
+        rng.integers(0, ntrials, size=(reps, ntrials), dtype=np.int32)
     ]
-    success_list = np.random.binomial(shot_list, probs)/shot_list
+    success_list = _draw_successes(shots, probs, rng, normal)/shots
     success = np.mean(success_list, 1)
                 
-    return success
\ No newline at end of file
+    return success
+
+
+def bootstrap_sweep_bounds(shots: np.ndarray,
+                           heavy: np.ndarray,
+                           reps: int = 1000,
+                           rng: SeedLike = None,
+                           approx: Union[bool, str] = 'auto',
+                           max_workers: Optional[int] = 1):
+    '''
+    Returns bootstrap CI bounds for each prefix of trials.
+
+    Entry i - 1 of the returned arrays holds the bounds from the first i
+    trials, for i = 1, ..., ntrials - 1. Each prefix is bootstrapped with
+    its own child seed. Prefixes run in a process pool unless max_workers
+    is 1; results do not depend on max_workers. See bootstrap for approx
+    and for why seeded results differ with and without numba.
+
+    The pool uses the spawn start method, so scripts calling this with
+    max_workers other than 1 must do so under an
+    if __name__ == '__main__': guard. Notebooks need no guard.
+    '''
+    ntrials = len(shots)
+    if ntrials < 2:
+        return np.empty(0), np.empty(0)
+
+    normal = _use_normal(shots, heavy, approx)
+    prefixes = np.arange(1, ntrials)
+    seeds = _spawn_seeds(rng, len(prefixes))
+
+    args = (
+        [shots[:i] for i in prefixes],
+        [heavy[:i] for i in prefixes],
+        repeat(reps),
+        seeds,
+        repeat(normal)
+    )
+    if max_workers == 1:
+        success = list(map(bootstrap, *args))
+    else:
+        # Forking after numba has started its thread pool can deadlock.
+        with ProcessPoolExecutor(
+            max_workers,
+            mp_context=multiprocessing.get_context('spawn')
+        ) as executor:
+            success = list(executor.map(bootstrap, *args))
+    success = np.array(success)
+
+    qv_mean = np.cumsum(heavy/shots)[:-1]/prefixes
+    lower_ci = 2*qv_mean - np.quantile(success, 1/2 + erf(np.sqrt(2))/2, axis=1)
+    upper_ci = 2*qv_mean - np.quantile(success, 1/2 - erf(np.sqrt(2))/2, axis=1)
+
+    return lower_ci, upper_ci
+
+
+def _spawn_seeds(rng, n):
+    ''' Returns n independent child seeds derived from rng. '''
+    if isinstance(rng, np.random.Generator):
+        rng = rng.integers(2**63)
+    if not isinstance(rng, np.random.SeedSequence):
+        rng = np.random.SeedSequence(rng)
+
+    return rng.spawn(n)
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _bootstrap_kernel(shots, heavy, reps, seeds, normal):
+        '''
+        Fused resample, binomial draw and average for each rep.
+
+        Seeds numba's global per-thread np.random state for each block.
+        '''
+        ntrials = shots.shape[0]
+        nblocks = min(reps, _KERNEL_BLOCKS)
+
+        success = np.empty(reps)
+        for b in prange(nblocks):
+            np.random.seed(seeds[b])
+            for r in range(b, reps, nblocks):
+                total = 0.0
+                for j in range(ntrials):
+                    k = np.random.randint(0, ntrials)
+                    p = heavy[k]/shots[k]
+                    if normal:
+                        mean = shots[j]*p
+                        draw = np.round(
+                            np.random.normal(mean, np.sqrt(mean*(1 - p)))
+                        )
+                        draw = min(max(draw, 0.0), shots[j])
+                    else:
+                        draw = np.random.binomial(shots[j], p)
+                    total += draw/shots[j]
+                success[r] = total/ntrials
+
+        return success
+else:
+    _bootstrap_kernel = None
+
+
+def _use_normal(shots, heavy, approx):
+    ''' Returns whether to use the normal approximation to the binomial. '''
+    if approx != 'auto':
+        return bool(approx)
+
+    probs = heavy/shots
+    return bool(
+        np.min(shots)*min(probs.min(), 1 - probs.max()) >= 25
+    )
+
+
+def _draw_successes(shots, probs, rng, normal):
+    ''' Draws binomial successes, or their normal approximation. '''
+    if not normal:
+        return rng.binomial(shots, probs)
+
+    mean = shots*probs
+    draw = np.round(rng.normal(mean, np.sqrt(mean*(1 - probs))))
+
+    return np.clip(draw, 0, shots)
+
+
+def _extract_arrays(qv_fitter,
+                    ntrials: Optional[int] = None):
+    ''' Returns shots and heavy output counts per trial as arrays. '''
+    if not ntrials:
+        ntrials = len(qv_fitter.heavy_output_counts)
+
+    nqubits = len(qv_fitter.qubit_lists[0])
+    keys = [f'qv_depth_{nqubits}_trial_{i}' for i in range(ntrials)]
+    shots = np.fromiter(
+        (qv_fitter._circ_shots[key] for key in keys),
+        dtype=np.int64,
+        count=ntrials
+    )
+    heavy = np.fromiter(
+        (qv_fitter.heavy_output_counts[key] for key in keys),
+        dtype=np.int64,
+        count=ntrials
+    )
+
+    return shots, heavy
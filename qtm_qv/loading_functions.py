@@ -14,14 +14,18 @@
 
 ''' Functions for loading quantum volume data from Quantinuum. '''
 
-from collections import Counter
+import hashlib
 import json
+import os
 import pathlib
+import pickle
+import tempfile
 
+import numpy as np
 from qiskit.result import Result
 from qiskit import QuantumCircuit
-from qiskit import execute
-from qiskit import Aer
+from qiskit import transpile
+from qiskit.providers.aer import AerSimulator
 import qiskit.ignis.verification.quantum_volume as qv
 
 
@@ -37,6 +41,7 @@ def data2qiskit(raw_results):
 
     """
     nqubits = len(raw_results[0][0])
+    place_values = np.uint64(1) << np.arange(nqubits - 1, -1, -1, dtype=np.uint64)
         
     results_out = []
     for i, res in enumerate(raw_results):
@@ -66,10 +71,19 @@ def data2qiskit(raw_results):
             'creg_sizes': [['cr', nqubits]],
             'qubit_labels': [['qr', j] for j in range(nqubits)]
         }
+        bits = np.frombuffer(''.join(res).encode('ascii'), dtype=np.uint8)
+        bits = bits.reshape(len(res), nqubits) - ord('0')
+        vals = bits.astype(np.uint64) @ place_values
+        if nqubits <= 20:
+            counts = np.bincount(vals.astype(np.int64), minlength=1)
+            outcomes = np.nonzero(counts)[0]
+            counts = counts[outcomes]
+        else:
+            outcomes, counts = np.unique(vals, return_counts=True)
         results_dict['results'][0]['data'] = {
             'counts': {
-                hex(int(cstr, 2)): count
-                for cstr, count in Counter(res).items()
+                hex(int(val)): int(count)
+                for val, count in zip(outcomes, counts)
             }
         }
         results_out.append(Result.from_dict(results_dict))
@@ -97,26 +111,93 @@ def ideal2qiskit(nqubits,
         qv_circs_nomeas: qv circuits without final measurement
        
     Returns:
-        list: list of qiskit Results objects for ideal circuits
+        Result: qiskit Result object with the ideal statevectors
         
     """
     qv_circs_new = []
     for i, circ in enumerate(qv_circs_nomeas):
         qv_circs_new.append(QuantumCircuit.from_qasm_str(circ))
         qv_circs_new[-1].name = f'qv_depth_{nqubits}_trial_{i}'
+        qv_circs_new[-1].save_statevector()
         
-    backend = Aer.get_backend('statevector_simulator')
-    res = execute(
-        qv_circs_new, 
-        backend=backend, 
-        optimization_level=0,
+    backend = AerSimulator(method='statevector')
+    res = backend.run(
+        transpile(qv_circs_new, backend, optimization_level=0),
+        max_parallel_experiments=0
     ).result()
     
     return res
 
 
+def cached_ideal2qiskit(nqubits,
+                        qv_circs_nomeas,
+                        cache_file):
+    """
+    Returns ideal state results, reusing a pickled copy when available.
+
+    The cache is keyed by a hash of the circuits and is rewritten if they
+    no longer match or the file cannot be loaded.
+    
+    Args:
+        nqubits: number of qubits
+        qv_circs_nomeas: qv circuits without final measurement
+        cache_file: path of pickle file to read and write
+       
+    Returns:
+        Result: qiskit Result object with the ideal statevectors
+        
+    """
+    circ_hash = hashlib.sha256(
+        '\n'.join(qv_circs_nomeas).encode()
+    ).hexdigest()
+
+    # Unreadable caches (truncated, or from another qiskit version) are
+    # re-simulated and overwritten.
+    try:
+        with open(cache_file, 'rb') as f:
+            cached = pickle.load(f)
+        if cached['hash'] == circ_hash:
+            return cached['results']
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError,
+            ImportError, KeyError, TypeError, ValueError):
+        pass
+
+    res = ideal2qiskit(nqubits, qv_circs_nomeas)
+
+    # Caching is best effort: an unwritable data directory or full disk
+    # still returns the results. Write to a temporary file first so an
+    # interrupted dump never leaves a partial cache behind.
+    tmp_name = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            dir=cache_file.parent,
+            suffix='.tmp',
+            delete=False
+        ) as f:
+            tmp_name = f.name
+            pickle.dump({'hash': circ_hash, 'results': res}, f)
+        # mkstemp creates the file as 0600; use the usual umask mode so
+        # other users of a shared data directory can read the cache.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_name, 0o666 & ~umask)
+        os.replace(tmp_name, cache_file)
+        tmp_name = None
+    except (OSError, pickle.PicklingError):
+        pass
+    finally:
+        if tmp_name is not None:
+            try:
+                os.remove(tmp_name)
+            except OSError:
+                pass
+
+    return res
+
+
 def load_fitter(machine, 
-                nqubits):
+                nqubits,
+                use_cache: bool = True):
 
     file_name = f'n{nqubits}_{machine}_raw_results.json'
     data_dir = pathlib.Path.cwd().parent.joinpath('data')
@@ -125,7 +206,14 @@ def load_fitter(machine,
         data = json.load(f)
 
     exp_results = data2qiskit(data['raw_results'])
-    ideal_results = ideal2qiskit(nqubits, data['qv_circs_nomeas'])
+    if use_cache:
+        ideal_results = cached_ideal2qiskit(
+            nqubits,
+            data['qv_circs_nomeas'],
+            data_dir.joinpath(f'n{nqubits}_{machine}_ideal.pkl')
+        )
+    else:
+        ideal_results = ideal2qiskit(nqubits, data['qv_circs_nomeas'])
 
     qv_fitter = qv.QVFitter(qubit_lists=[list(range(nqubits))])
     qv_fitter.add_statevectors(ideal_results)
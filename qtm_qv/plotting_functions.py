@@ -20,7 +20,11 @@ from typing import Optional
 import numpy as np
 import matplotlib.pyplot as plt
 
-from qtm_qv.analysis_functions import bootstrap_bounds, original_bounds
+from qtm_qv.analysis_functions import (
+    _extract_arrays,
+    bootstrap_sweep_bounds,
+    original_bounds
+)
 
 ecolor = plt.get_cmap('tab10').colors
 
@@ -30,17 +34,30 @@ def success_v_time(qv_fitter,
                    original_ci: bool = False,
                    bootstrap_ci: bool = False,
                    fill_range: bool = False,
-                   savename: Optional[str] = None):
-    """Plot success as function of circuit index."""
+                   savename: Optional[str] = None,
+                   max_workers: Optional[int] = 1,
+                   seed: Optional[int] = None):
+    """
+    Plot success as function of circuit index.
+
+    nqubits is ignored and kept only for call compatibility; the number of
+    qubits is read from qv_fitter.
+
+    max_workers and seed are passed to bootstrap_sweep_bounds for the
+    bootstrap CI. With max_workers other than 1 the sweep runs in a spawned
+    process pool, so scripts must call this under an
+    if __name__ == '__main__': guard.
+    A seed reproduces the bootstrap CI only within one environment, since
+    results differ depending on whether numba is installed.
+    """
           
     axis_font = 14
 
-    ntrials = len(qv_fitter.heavy_output_counts)
-    heavy_outputs = [
-        qv_fitter.heavy_output_counts[f'qv_depth_{nqubits}_trial_{i}']/qv_fitter._circ_shots[f'qv_depth_{nqubits}_trial_{i}']
-        for i in range(ntrials)
-    ]
+    shots, heavy = _extract_arrays(qv_fitter)
+    heavy_outputs = heavy/shots
     ntrials = len(heavy_outputs)
+    avg = cumulative_average(heavy_outputs)
+    xs = np.arange(1, ntrials)
     fig, ax = plt.subplots(figsize=(7,4))
 
     legend = []
@@ -58,8 +75,8 @@ def success_v_time(qv_fitter,
     legend_name.append('Individual circuit')
     legend.append(
         ax.plot(
-            np.arange(1, ntrials), 
-            cumulative_average(heavy_outputs), 
+            xs, 
+            avg, 
             color=ecolor[0], 
             linewidth=2.5
         )[0]
@@ -67,37 +84,34 @@ def success_v_time(qv_fitter,
     legend_name.append('Average')
 
     if bootstrap_ci:
-        b_lower = []
-        b_upper = []
-        for i in range(1, ntrials):
-            lower_ci, upper_ci = bootstrap_bounds(
-                qv_fitter, 
-                reps=10000, 
-                ntrials=i
-            )
-            b_lower.append(lower_ci)
-            b_upper.append(upper_ci)
+        b_lower, b_upper = bootstrap_sweep_bounds(
+            shots,
+            heavy,
+            reps=10000,
+            rng=np.random.SeedSequence(seed),
+            max_workers=max_workers
+        )
         if fill_range:
             legend.append(
                 ax.plot(
-                    np.arange(1, ntrials), 
-                    np.array(b_upper), 
+                    xs, 
+                    b_upper, 
                     color=ecolor[2], 
                     linestyle='-', 
                     linewidth=1.5
                 )[0]
             )
             ax.plot(
-                np.arange(1, ntrials), 
-                np.array(b_lower), 
+                xs, 
+                b_lower, 
                 color=ecolor[2], 
                 linestyle='-', 
                 linewidth=1.5
             )
             ax.fill_between(
-                np.arange(1, ntrials), 
-                y1=np.array(b_upper), 
-                y2=np.array(b_lower), 
+                xs, 
+                y1=b_upper, 
+                y2=b_lower, 
                 alpha=0.3, 
                 color=ecolor[2]
             )
@@ -105,8 +119,8 @@ def success_v_time(qv_fitter,
         else:
             legend.append(
                 ax.plot(
-                    np.arange(1, ntrials), 
-                    np.array(b_lower), 
+                    xs, 
+                    b_lower, 
                     color=ecolor[2], 
                     linestyle='-', 
                     linewidth=2
@@ -115,36 +129,31 @@ def success_v_time(qv_fitter,
             legend_name.append('Bootstrap CI bound')
 
     if original_ci:
-        o_lower = []
-        o_upper = []
-        for i in range(1, ntrials): 
-            lower_ci, upper_ci = original_bounds(
-                np.mean(heavy_outputs[:i]),
-                i
-            )
-            o_lower.append(lower_ci)
-            o_upper.append(upper_ci)
+        o_lower, o_upper = original_bounds(
+            avg,
+            xs
+        )
         if fill_range:
             legend.append(
                     ax.plot(
-                        np.arange(1, ntrials), 
-                        np.array(o_lower), 
+                        xs, 
+                        o_lower, 
                         color=ecolor[1], 
                         linestyle='-', 
                         linewidth=1.5
                     )[0]
                 )
             ax.plot(
-                np.arange(1, ntrials), 
-                np.array(o_upper), 
+                xs, 
+                o_upper, 
                 color=ecolor[1], 
                 linestyle='-', 
                 linewidth=1.5
             )
             ax.fill_between(
-                np.arange(1, ntrials), 
-                y1=np.array(o_upper), 
-                y2=np.array(o_lower), 
+                xs, 
+                y1=o_upper, 
+                y2=o_lower, 
                 alpha=0.3, 
                 color=ecolor[1],
                 label='_nolegend_'
@@ -153,8 +162,8 @@ def success_v_time(qv_fitter,
         else:
             legend.append(
                 ax.plot(
-                    np.arange(1, ntrials), 
-                    np.array(o_lower), 
+                    xs, 
+                    o_lower, 
                     color=ecolor[1], 
                     linestyle='-', 
                     linewidth=2
@@ -189,7 +198,8 @@ def success_v_time(qv_fitter,
 
 
 def cumulative_average(sample):
-    
-    avg = [np.mean(sample[:i]) for i in range(1, len(sample))]
-    
-    return np.array(avg)
\ No newline at end of file
+
+    sample = np.asarray(sample, dtype=np.float64)
+    avg = np.cumsum(sample)[:-1]/np.arange(1, sample.size, dtype=np.float64)
+
+    return avg
\ No newline at end of file
@@ -15,20 +15,38 @@
 
 """Functions for simulating QVT circuits."""
 
-from qiskit import QuantumCircuit
+from collections import Counter
+import re
+
+import numpy as np
+
+_GATES = ('u1', 'u2', 'u3', 'cx', 'cz')
+
+# Name of a counted gate at the start of a QASM line.
+_GATE_PATTERN = re.compile(rf'^\s*({"|".join(_GATES)})\b', re.M)
 
 
 def gate_counts(qv_circs):
-    """Save all attributes of QVFitter object."""
+    """
+    Count u1, u2, u3, cx and cz gates in each circuit.
+
+    Circuits may be QuantumCircuit objects or QASM strings. QASM strings
+    are scanned line by line rather than parsed, so they must be flat,
+    one-statement-per-line QASM as emitted by qiskit. Several statements
+    on one line or gates inside custom gate definitions are miscounted,
+    and invalid QASM is not rejected.
+    """
     
-    gcounts = {'u1': [], 'u2':[], 'u3':[], 'cx': [], 'cz':[]}
-    for qc in qv_circs:
+    gcounts = {
+        key: np.zeros(len(qv_circs), dtype=np.int32)
+        for key in _GATES
+    }
+    for i, qc in enumerate(qv_circs):
         try: 
             count_dict = qc.count_ops()
         except AttributeError:
-            count_dict = QuantumCircuit.from_qasm_str(qc).count_ops()
-        [
-            gcounts[key].append(count_dict[key]) 
-            for key in gcounts if key in count_dict
-        ]
+            count_dict = Counter(_GATE_PATTERN.findall(qc))
+        for key in gcounts:
+            gcounts[key][i] = count_dict.get(key, 0)
+
     return gcounts
@@ -36,6 +36,7 @@ setuptools.setup(
     url="",
     packages=setuptools.find_namespace_packages(),
     install_requires=requirements,
+    extras_require={'numba': ['numba>=0.53']},
     python_requires=">=3.8",
     include_package_data=True,
     keywords="quantum computing",